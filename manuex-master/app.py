@@ -1,4 +1,8 @@
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 from doctest import set_unittest_reportflags
 from flask import Flask, render_template, url_for, request, redirect
 import weather
@@ -6,60 +10,146 @@ from controller import Controller
 
 app = Flask(__name__)
 
+
+@dataclass(frozen=True)
+class Settings:
+    """User settings. Replaced as a whole on change so concurrent requests never see a mix of old and new values."""
+    threshold: int
+    water_amount: int
+    location: str
+
+
 # Ideally this should be in a file or database
-threshold: int = 45
-water_amount: int = 50
-location: str = 'Eindhoven'
+current_settings: Settings = Settings(45, 50, 'Eindhoven')
 sensor_moisture = 0
 #moisture_value: int = 0
 
+# Weather is refreshed in the background so requests never wait on the API
+# Matches the WeatherAPI ttl, so each periodic refresh is a cache miss and fetches fresh data
+REFRESH_INTERVAL: int = 600
+RETRY_INTERVAL: int = 30
+MAX_STALENESS: int = 3 * REFRESH_INTERVAL
+last_refresh: float = 0
+last_refresh_error: Optional[Exception] = None
+# Location that weather_data currently holds, may lag behind current_settings after a change
+weather_location: str = ''
+refresh_now = threading.Event()
+
+
+def refresh_weather() -> None:
+    """Updates weather_data every REFRESH_INTERVAL seconds, or sooner when refresh_now is set.
+    A failed refresh is retried after RETRY_INTERVAL while the previous data keeps being served.
+    """
+    global last_refresh
+    global last_refresh_error
+    global weather_location
+
+    interval = REFRESH_INTERVAL
+    while True:
+        refresh_now.wait(interval)
+        refresh_now.clear()
+        location = current_settings.location
+        try:
+            weather_data.update(location)
+            weather_location = location
+            last_refresh = time.monotonic()
+            last_refresh_error = None
+            interval = REFRESH_INTERVAL
+        except Exception as ex:
+            print('Cannot refresh weather data')
+            print(ex)
+            last_refresh_error = ex
+            interval = RETRY_INTERVAL
+
+
+# The sensor posts often; a reading close to the previous one reuses the previous decision
+DECISION_HYSTERESIS: int = 2
+DECISION_MAX_AGE: int = 60
+last_decision: dict = {'ts': 0, 'moisture': None, 'threshold': None, 'forecast': None, 'value': False}
+
+
+def weather_error() -> Optional[Exception]:
+    """Returns why weather_data cannot be used, or None if it is current.
+    Failed refreshes are tolerated until MAX_STALENESS, unless the data is for a previous location.
+    """
+    if weather_location != current_settings.location:
+        if last_refresh_error is not None:
+            return last_refresh_error
+
+        return ValueError(f'Weather data for {current_settings.location} is still being fetched')
+
+    if time.monotonic() - last_refresh > MAX_STALENESS:
+        return ValueError('Weather data is out of date')
+
+    return None
+
 
 @app.route('/')
 def index():
-    global location
-    try:
-        weather_data.update(location)
-    except (ValueError, ConnectionError) as ex:
-        return render_template('error.html', error=ex)
+    error = weather_error()
+    if error:
+        return render_template('error.html', error=error)
 
     return render_template('index.html', data=weather_data, sensor_moisture=sensor_moisture)
 
 
 @app.route('/forecast')
 def forecast():
-    global location
-    try:
-        weather_data.update(location)
-    except (ValueError, ConnectionError) as ex:
-        return render_template('error.html', error=ex)
+    error = weather_error()
+    if error:
+        return render_template('error.html', error=error)
 
     return render_template('forecast.html', data=weather_data)
 
 
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
-    global threshold
-    global water_amount
-    global location
-
-    print(threshold, water_amount)
+    global current_settings
+    global last_refresh_error
 
     if request.method == 'POST':
-        location = request.form["location"]
-        threshold = request.form["threshold"]
-        water_amount = request.form["water-amount"]
+        current_settings = Settings(
+            threshold=int(request.form["threshold"]),
+            water_amount=int(request.form["water-amount"]),
+            location=request.form["location"])
+        # An earlier failure says nothing about the new location
+        last_refresh_error = None
+        refresh_now.set()
+
+    s = current_settings
+    print(s.threshold, s.water_amount)
 
-    return render_template('settings.html', threshold=threshold, water_amount=water_amount, location=location)
+    return render_template('settings.html', threshold=s.threshold, water_amount=s.water_amount, location=s.location)
 
 
 @app.route('/base', methods=['POST'])
 def display():
     global sensor_moisture
+    global last_decision
     sensor_moisture = request.get_data()
     moisture_value = int(sensor_moisture.decode("utf-8"))
     print(moisture_value)
-    weather_data.update(location)
-    return str(Controller.make_decision(weather_data.forecast, moisture_value, threshold))
+
+    # Refuse to decide from a forecast for a previous location or one that is too old
+    error = weather_error()
+    if error:
+        return str(error), 503
+
+    now = time.monotonic()
+    threshold = current_settings.threshold
+    current_forecast = weather_data.forecast
+    last = last_decision
+
+    if (last['moisture'] is not None
+            and abs(moisture_value - last['moisture']) < DECISION_HYSTERESIS
+            and now - last['ts'] < DECISION_MAX_AGE
+            and last['threshold'] == threshold
+            and last['forecast'] is current_forecast):
+        return str(last['value'])
+
+    value = Controller.make_decision(current_forecast, moisture_value, threshold)
+    last_decision = {'ts': now, 'moisture': moisture_value, 'threshold': threshold, 'forecast': current_forecast, 'value': value}
+    return str(value)
 
 
 @app.route('/override')
@@ -73,13 +163,28 @@ def override():
     return render_template('override.html', last_watered=last_watered)
 
 
-if __name__ == "__main__":
-    try:
-        weather_data = weather.WeatherAPI(
-            location, '2096fe218663d046a3a37855c4aea57f')
-    except (ValueError, ConnectionError) as ex:
-        print('Cannot start application')
-        print(ex)
-        exit()
+def start_refresher() -> None:
+    """Starts the background weather refresh, fetching straight away rather than after REFRESH_INTERVAL.
+    Under gunicorn this runs in each worker, see gunicorn.conf.py.
+    """
+    refresh_now.set()
+    threading.Thread(target=refresh_weather, daemon=True).start()
+
 
+# Created on import so a preloading server fetches the weather once and shares it with its workers
+try:
+    weather_data = weather.WeatherAPI(
+        current_settings.location, '2096fe218663d046a3a37855c4aea57f')
+except (ValueError, ConnectionError) as ex:
+    print('Cannot start application')
+    print(ex)
+    exit()
+
+weather_location = current_settings.location
+last_refresh = time.monotonic()
+
+
+if __name__ == "__main__":
+    # Development server only, run under gunicorn in production: gunicorn -c gunicorn.conf.py app:app
+    start_refresher()
     app.run(host='0.0.0.0', port=5000, debug=False)
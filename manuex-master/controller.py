@@ -10,28 +10,15 @@ class Controller:
 
         # Convert hours to time steps
         lookahead_time_steps: int = lookahead_hours // 3
-        total_rainfall: float = 0
-        max_temp: float = 0
-        max_humidity: int = 0
 
-        # Accumulate forecast data
-        for time_step in forecast.data[:lookahead_time_steps]:
-            if time_step.rain_three_hours:
-                total_rainfall += time_step.rain_three_hours
-
-            if time_step.temp > max_temp:
-                max_temp = time_step.temp
+        # Accoring to very qucik skim of a google search, plants need 0.45mm of water per 3 hours hence the 0.45
+        # Cheap checks on the sensor reading come first so the forecast is only scanned when it matters
+        if sensor_moisture >= moisture_treshlod:
+            if sensor_moisture >= 60:
+                return False
 
-            if time_step.humidity > max_humidity:
-                max_humidity = time_step.humidity
+            if not any(temp > 30 for temp in forecast.temps[:lookahead_time_steps]):
+                return False
 
-        # Accoring to very qucik skim of a google search, plants need 0.45mm of water per 3 hours hence the 0.45
-        if sensor_moisture < moisture_treshlod:
-            if total_rainfall < 0.45 * lookahead_time_steps:
-                return True
-        else:
-            if max_temp > 30:
-                if total_rainfall < 0.45 * lookahead_time_steps and sensor_moisture < 60:
-                    return True
-
-        return False
+        total_rainfall: float = sum(forecast.rain[:lookahead_time_steps])
+        return total_rainfall < 0.45 * lookahead_time_steps
@@ -0,0 +1,21 @@
+# Production server settings, run with: gunicorn -c gunicorn.conf.py app:app
+bind = '0.0.0.0:5000'
+
+# Settings live in process memory, so a single worker keeps them consistent.
+# They are not persisted: a restarted worker starts again from the defaults in app.py.
+# Requests never wait on the weather API, so threads give enough concurrency.
+workers = 1
+worker_class = 'gthread'
+threads = 8
+
+# Import the app, and fetch the weather, once in the master before forking
+preload_app = True
+
+
+# Only the forking thread exists in the child process. Threads started before the fork are
+# gone, and pooled sockets are still shared with the master. So every forked worker,
+# including ones respawned after a crash, timeout or HUP, starts its own refresh thread
+# here, and weather.py gives it a fresh connection pool and executor.
+def post_fork(server, worker):
+    from app import start_refresher
+    start_refresher()
@@ -0,0 +1,41 @@
+import random
+from types import SimpleNamespace
+
+from controller import Controller
+
+
+def reference_decision(temps, rain, sensor_moisture, moisture_treshlod, lookahead_hours):
+    """The original loop based make_decision, kept to check the short-circuiting version against."""
+    lookahead_time_steps = lookahead_hours // 3
+    total_rainfall = 0
+    max_temp = 0
+
+    for temp, rain_three_hours in zip(temps[:lookahead_time_steps], rain[:lookahead_time_steps]):
+        if rain_three_hours:
+            total_rainfall += rain_three_hours
+
+        if temp > max_temp:
+            max_temp = temp
+
+    if sensor_moisture < moisture_treshlod:
+        if total_rainfall < 0.45 * lookahead_time_steps:
+            return True
+    else:
+        if max_temp > 30:
+            if total_rainfall < 0.45 * lookahead_time_steps and sensor_moisture < 60:
+                return True
+
+    return False
+
+
+def test_make_decision_matches_reference():
+    rng = random.Random(0)
+
+    for _ in range(20000):
+        steps = rng.randint(0, 10)
+        temps = [rng.uniform(-5, 40) for _ in range(steps)]
+        rain = [rng.choice([0.0, 0.1, 0.5, 2.0]) for _ in range(steps)]
+        forecast = SimpleNamespace(temps=temps, rain=rain)
+        args = (rng.randint(0, 100), rng.randint(0, 100), rng.choice([3, 6, 9, 12, 24]))
+
+        assert Controller.make_decision(forecast, *args) == reference_decision(temps, rain, *args)
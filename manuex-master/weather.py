@@ -1,6 +1,43 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List
-from requests import get, ConnectionError
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Tuple
+from requests import Session, ConnectionError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson parses the API responses several times faster; fall back to the standard library if it is not installed
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+# Both endpoints live on the same host, so one pooled keep-alive session
+# lets every call after the first skip the TCP and TLS handshakes.
+# Transient server errors are retried with a short backoff; if they persist the
+# last response is returned and rejected by the response code check in get_weather.
+_RETRY = Retry(total=2, backoff_factor=0.2, status_forcelist=(500, 502, 503, 504),
+               allowed_methods=('GET',), raise_on_status=False)
+_SESSION = Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=_RETRY))
+_SESSION.headers.update({'User-Agent': 'manuex/1.0'})
+
+# The current weather and forecast requests are independent, so they are sent in parallel
+_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+
+def _reset_after_fork() -> None:
+    """Gives a forked worker its own connection pool and executor threads, see gunicorn.conf.py."""
+    global _EXECUTOR
+    _SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=_RETRY))
+    _EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 class DataPoint:
@@ -9,7 +46,7 @@ class DataPoint:
     The data point can be either current weather or one of the forecast time steps.
     It contains all of the attributes deemed necessary for the forecast module.
     """
-    dt: datetime
+    dt_timestamp: int
     temp: float
     humidity: int
     id: int
@@ -29,15 +66,24 @@ class DataPoint:
         Returns:
             None
         """
-        self.dt = datetime.fromtimestamp(json['dt'])
-        self.temp = json.get('main', {})['temp']
-        self.humidity = json.get('main', {})['humidity']
-        self.id = json.get('weather', [])[0]['id']
-        self.description = json.get('weather', [])[0]['description']
-        self.icon = json.get('weather', [])[0]['icon']
+        main = json.get('main') or {}
+        weather = (json.get('weather') or [{}])[0]
+        rain = json.get('rain') or {}
+
+        self.dt_timestamp = json['dt']
+        self.temp = main['temp']
+        self.humidity = main['humidity']
+        self.id = weather['id']
+        self.description = weather['description']
+        self.icon = weather['icon']
         self.city_name = json.get('name', {})
-        self.rain_last_hour = json.get('rain', {}).get('1h', {})
-        self.rain_three_hours = json.get('rain', {}).get('3h', {})
+        self.rain_last_hour = rain.get('1h', {})
+        self.rain_three_hours = rain.get('3h', {})
+
+    @cached_property
+    def dt(self) -> datetime:
+        """Time of the data point. Only built when first read, since the controller never needs it."""
+        return datetime.fromtimestamp(self.dt_timestamp)
 
 
 class Forecast:
@@ -45,6 +91,8 @@ class Forecast:
     Each data point represents a single time step.
     """
     data: List[DataPoint]
+    temps: List[float]
+    rain: List[float]
 
     def __init__(self, json: Dict) -> None:
         """Initializes the forecast object with a list of data points.
@@ -58,6 +106,18 @@ class Forecast:
         """
         self.data = [DataPoint(i) for i in json['list']]
 
+        # Parallel per-attribute lists so the controller can aggregate them with builtins
+        self.temps = [i.temp for i in self.data]
+        self.rain = [i.rain_three_hours or 0.0 for i in self.data]
+
+
+@lru_cache(maxsize=32)
+def _build_urls(location_name: str, api_key: str, units: str, count: int) -> Tuple[str, str]:
+    """Builds the current weather and forecast URLs once per set of parameters."""
+    query = f'q={location_name}&appid={api_key}&units={units}'
+    return (f'https://api.openweathermap.org/data/2.5/weather?{query}',
+            f'https://api.openweathermap.org/data/2.5/forecast?{query}&cnt={count}')
+
 
 class WeatherAPI:
     """
@@ -67,7 +127,7 @@ class WeatherAPI:
     current: DataPoint
     forecast: Forecast
 
-    def __init__(self, location_name: str, api_key: str, units: str = 'metric', count: int = 8) -> None:
+    def __init__(self, location_name: str, api_key: str, units: str = 'metric', count: int = 8, ttl: float = 600) -> None:
         """Initializes the weather API object with the current weather and forecast data.
         Units are metric by default and the forcast returrns 8 time steps (24 hours).
 
@@ -76,6 +136,7 @@ class WeatherAPI:
             api_key (str): OpenWeatherMap API key
             units(str) [Optioanl]: Units of the weather data. Default is metric
             count (int) [Optional]: Number of time steps in the forecast. Default is 8 (24 hours)
+            ttl (float) [Optional]: Seconds a fetched result is reused before the API is called again. Default is 600 (10 minutes)
 
         Errors:
             ValueError: If the response from the API is not valid
@@ -85,16 +146,41 @@ class WeatherAPI:
         self.api_key = api_key
         self.units = units
         self.count = count
+        self.ttl = ttl
+        self.session = _SESSION
+        self._cache: Dict[Tuple[str, str, int], Tuple[float, DataPoint, Forecast]] = {}
+        self._lock = threading.Lock()
         self.update(self.location_name)
 
     def update(self, location: str) -> None:
-        """Updates the current weather and forecast data."""
-        self.get_weather(location, self.api_key,
-                         self.units, self.count)
+        """Updates the current weather and forecast data.
+        OpenWeatherMap only refreshes its data every 10 minutes, so results
+        younger than the TTL are reused instead of calling the API again.
+        A periodic caller with an interval of at least the TTL always misses;
+        the cache then only helps when switching back to a recent location.
+        """
+        key = (location, self.units, self.count)
+
+        # Serialise updates so concurrent callers wait for one fetch instead of each calling the API
+        with self._lock:
+            now = time.monotonic()
+
+            cached = self._cache.get(key)
+            if cached and now - cached[0] < self.ttl:
+                _, self.current, self.forecast = cached
+                return
+
+            self.get_weather(location, self.api_key,
+                             self.units, self.count)
+
+            # Drop expired entries so locations typed once do not stay in memory
+            self._cache = {k: v for k, v in self._cache.items() if now - v[0] < self.ttl}
+            self._cache[key] = (now, self.current, self.forecast)
 
     def get_weather(self, location_name: str, api_key: str, units: str, count) -> None:
         """
         Makes a GET request to the OpenWeatherMap API and retrieves the current weather and forecast form different endpoints.
+        Both requests are issued concurrently, so the update takes one round trip instead of two.
 
         Args:
             location_name (str): Name of the location to get weather for
@@ -105,16 +191,18 @@ class WeatherAPI:
         Errors:
             ValueError: If the response from the API is not valid
         """
+        weather_url, forecast_url = _build_urls(location_name, api_key, units, count)
+
         try:
-            current = get(
-                f'https://api.openweathermap.org/data/2.5/weather?q={location_name}&appid={api_key}&units={units}', timeout=5)
-            forecast = get(
-                f'https://api.openweathermap.org/data/2.5/forecast?q={location_name}&appid={api_key}&units={units}&cnt={count}', timeout=5)
+            current_future = _EXECUTOR.submit(self.session.get, weather_url, timeout=5)
+            forecast_future = _EXECUTOR.submit(self.session.get, forecast_url, timeout=5)
+            current = current_future.result()
+            forecast = forecast_future.result()
         except ConnectionError:
             raise
 
-        current_json = current.json()
-        forecast_json = forecast.json()
+        current_json = loads(current.content)
+        forecast_json = loads(forecast.content)
 
         if not current_json or not forecast_json or current_json['cod'] != 200 or forecast_json['cod'] != '200':
             raise ValueError(